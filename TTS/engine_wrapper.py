@@ -188,9 +188,9 @@ class TTSEngine:
 
 def process_text(text: str, clean: bool = True):
     lang = settings.config["reddit"]["thread"]["post_lang"]
-    new_text = sanitize_text(text) if clean else text
     if lang:
+        # The translated text replaces the original, so sanitizing the original first is wasted
         print_substep("Translating Text...")
         translated_text = translators.translate_text(text, translator="google", to_language=lang)
-        new_text = sanitize_text(translated_text)
-    return new_text
+        return sanitize_text(translated_text)
+    return sanitize_text(text) if clean else text
@@ -1,8 +1,24 @@
 #!/usr/bin/env python3
 import subprocess
 import os
+from functools import lru_cache
 from pathlib import Path
 
+import ffmpeg
+
+@lru_cache(maxsize=32)
+def _probe_wh(path):
+    """Return (width, height) of the first video stream in path, or None if ffprobe fails.
+    Cached so repeated renders against the same background only spawn ffprobe once."""
+    try:
+        video_info = ffmpeg.probe(path, select_streams='v:0', show_entries='stream=width,height')
+    except ffmpeg.Error:
+        return None
+    if not video_info.get('streams'):
+        return None
+    video_stream = video_info['streams'][0]
+    return int(video_stream['width']), int(video_stream['height'])
+
 def create_easy_sync_video():
     """Create a portrait video with larger text chunks for easy subtitle syncing"""
     
@@ -30,21 +46,11 @@ def create_easy_sync_video():
         bg_sync_path = f'{base_path}/bg_sync.mp4'
         
         # Get video dimensions and scale perfectly
-        probe_cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams',
-            'assets/backgrounds/video/bbswitzer-minecraft.mp4'
-        ]
-        
-        result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
+        dimensions = _probe_wh('assets/backgrounds/video/bbswitzer-minecraft.mp4')
+        if dimensions is None:
             print("❌ Could not probe video dimensions")
             return False
-        
-        import json
-        video_info = json.loads(result.stdout)
-        video_stream = next(s for s in video_info['streams'] if s['codec_type'] == 'video')
-        orig_width = int(video_stream['width'])
-        orig_height = int(video_stream['height'])
+        orig_width, orig_height = dimensions
         
         # Perfect scaling math
         scale_factor = H / orig_height
@@ -1,19 +1,59 @@
-from PIL.ImageFont import FreeTypeFont, ImageFont
+from functools import lru_cache
 
+from PIL.ImageFont import FreeTypeFont, ImageFont, load_default, truetype
 
-def getsize(font: ImageFont | FreeTypeFont, text: str):
-    # Ensure text is a string
-    if not isinstance(text, str):
-        text = str(text) if text is not None else ""
+
+@lru_cache(maxsize=32)
+def load_font(path: str, size: int) -> FreeTypeFont:
+    """Loads a TrueType font once per (path, size); parsing the TTF file is the expensive part"""
+    return truetype(path, size)
+
+
+def load_font_or_default(path: str, size: int) -> ImageFont | FreeTypeFont:
+    """Same as load_font, but falls back to Pillow's built-in font if the file can't be loaded"""
+    try:
+        return load_font(path, size)
+    except OSError:
+        return load_default()
+
+
+@lru_cache(maxsize=4096)
+def _measure(font: ImageFont | FreeTypeFont, text: str):
+    # Keyed on the font object itself; fonts live for the whole run and titles,
+    # headers and short lines are measured over and over again
     left, top, right, bottom = font.getbbox(text)
-    width = right - left
-    height = bottom - top
-    return width, height
+    return right - left, bottom - top
+
+
+def ensure_str(text) -> str:
+    """Normalizes post text (a string, a list of paragraphs or None) into a single string.
+    Call it once where text enters the pipeline so the measuring helpers can assume str.
+    """
+    if isinstance(text, str):
+        return text
+    if text is None:
+        return ""
+    if isinstance(text, list):
+        return " ".join(str(item) for item in text)
+    return str(text)
+
+
+def getsize(font: ImageFont | FreeTypeFont, text: str):
+    return _measure(font, text)
+
+
+@lru_cache(maxsize=4096)
+def getlength(font: ImageFont | FreeTypeFont, text: str) -> float:
+    """Advance width of text, the distance the pen moves; used to lay words out on a line"""
+    return font.getlength(text)
 
 
 def getheight(font: ImageFont | FreeTypeFont, text: str):
-    # Ensure text is a string  
-    if not isinstance(text, str):
-        text = str(text) if text is not None else ""
+    # Line height comes from the font metrics, so no per-string layout is needed
+    try:
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    except AttributeError:  # bitmap fonts have no metrics table
+        pass
     _, height = getsize(font, text)
     return height
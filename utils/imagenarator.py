@@ -1,12 +1,18 @@
+import io
 import os
 import re
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from rich.progress import track
 
 from TTS.engine_wrapper import process_text
-from utils.fonts import getheight, getsize
+from utils.fonts import getheight, getsize, load_font
+
+# Encoded PNGs that may wait for the writer thread at once (about 1-3 MB each)
+MAX_PENDING_WRITES = 8
 
 
 def draw_multiple_line_text(
@@ -22,34 +28,17 @@ def draw_multiple_line_text(
     y = (image_height / 2) - (((font_height + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
     for line in lines:
         line_width, line_height = getsize(font, line)
-        if transparent:
-            shadowcolor = "black"
-            for i in range(1, 5):
-                draw.text(
-                    ((image_width - line_width) / 2 - i, y - i),
-                    line,
-                    font=font,
-                    fill=shadowcolor,
-                )
-                draw.text(
-                    ((image_width - line_width) / 2 + i, y - i),
-                    line,
-                    font=font,
-                    fill=shadowcolor,
-                )
-                draw.text(
-                    ((image_width - line_width) / 2 - i, y + i),
-                    line,
-                    font=font,
-                    fill=shadowcolor,
-                )
-                draw.text(
-                    ((image_width - line_width) / 2 + i, y + i),
-                    line,
-                    font=font,
-                    fill=shadowcolor,
-                )
-        draw.text(((image_width - line_width) / 2, y), line, font=font, fill=text_color)
+        # On transparent backgrounds the text gets a black outline so it stays readable.
+        # FreeType strokes the glyphs in the same pass that draws them, instead of the text
+        # being rasterized again at every shadow offset
+        draw.text(
+            ((image_width - line_width) / 2, y),
+            line,
+            font=font,
+            fill=text_color,
+            stroke_width=4 if transparent else 0,
+            stroke_fill="black",
+        )
         y += line_height + padding
 
 
@@ -61,15 +50,35 @@ def imagemaker(theme, reddit_obj: dict, txtclr, padding=5, transparent=False) ->
     id = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
 
     if transparent:
-        font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 100)
+        font = load_font(os.path.join("fonts", "Roboto-Bold.ttf"), 100)
     else:
-        font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 100)
+        font = load_font(os.path.join("fonts", "Roboto-Regular.ttf"), 100)
     size = (1920, 1080)
 
+    # One canvas is reused for every image; filling it with the theme colour clears it in
+    # place instead of allocating a new 8 MB buffer per image
     image = Image.new("RGBA", size, theme)
 
-    for idx, text in track(enumerate(texts), "Rendering Image"):
-        image = Image.new("RGBA", size, theme)
-        text = process_text(text, False)
-        draw_multiple_line_text(image, text, font, txtclr, padding, wrap=30, transparent=transparent)
-        image.save(f"assets/temp/{id}/png/img{idx}.png")
+    # The PNGs are encoded here but written to disk by a separate thread, so a slow disk
+    # never holds up drawing the next image
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        writes = []
+        for idx, text in track(enumerate(texts), "Rendering Image"):
+            if idx:
+                image.paste(theme, (0, 0, *size))
+            text = process_text(text, False)
+            draw_multiple_line_text(
+                image, text, font, txtclr, padding, wrap=30, transparent=transparent
+            )
+            # Fast zlib level: the images are temporary and only read back by ffmpeg
+            png = io.BytesIO()
+            image.save(png, "PNG", compress_level=1)
+            if len(writes) >= MAX_PENDING_WRITES:
+                # Back-pressure: when the disk falls behind, wait for the oldest pending write
+                # instead of holding every encoded image in memory
+                writes[-MAX_PENDING_WRITES].result()
+            writes.append(
+                writer.submit(Path(f"assets/temp/{id}/png/img{idx}.png").write_bytes, png.getvalue())
+            )
+        for write in writes:
+            write.result()
@@ -1,65 +1,157 @@
-import multiprocessing
 import os
 import re
-import tempfile
+import subprocess
 import textwrap
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from os.path import exists  # Needs to be imported specifically
 from pathlib import Path
-from typing import Dict, Final, Tuple
+from typing import Dict, Final, List, Tuple
 
 import ffmpeg
 import translators
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from rich.console import Console
 from rich.progress import track
 
 from utils import settings
 from utils.cleanup import cleanup
 from utils.console import print_step, print_substep
-from utils.fonts import getheight
+from utils.fonts import getheight, load_font
 from utils.thumbnail import create_thumbnail
 from utils.videos import save_data
 
 console = Console()
 
+# H.264 encoders in order of preference with their rate-control options.
+# Hardware encoders are tried first; libx264 is the software fallback that always works.
+H264_ENCODERS: Final[Dict[str, Dict]] = {
+    "h264_nvenc": {
+        "preset": "p4",
+        "tune": "hq",
+        "rc": "vbr",
+        "cq": 19,
+        "b:v": "20M",
+        "maxrate": "25M",
+        "bufsize": "40M",
+    },
+    "h264_qsv": {"preset": "veryfast", "global_quality": 23},
+    "h264_amf": {"quality": "speed", "rc": "cqp", "qp_i": 23, "qp_p": 23},
+    "h264_videotoolbox": {"b:v": "20M"},
+    # x264 stops gaining from frame threads around 16; more only adds lookahead contention
+    "libx264": {"preset": "veryfast", "crf": 23, "threads": min(os.cpu_count() or 1, 16)},
+}
+
+# Filename clean-up for name_normalize, compiled once. The slash rules run as ordered passes,
+# each one seeing the output of the one before, so their order matters
+_FORBIDDEN_CHARS: Final[re.Pattern] = re.compile(r'[?\\"%*:|<>]')
+_SLASH_RULES: Final = (
+    (re.compile(r"( [w,W]\s?\/\s?[o,O,0])"), r" without"),
+    (re.compile(r"( [w,W]\s?\/)"), r" with"),
+    (re.compile(r"(\d+)\s?\/\s?(\d+)"), r"\1 of \2"),
+    (re.compile(r"(\w+)\s?\/\s?(\w+)"), r"\1 or \2"),
+    (re.compile(r"\/"), r""),
+)
+
 
 class ProgressFfmpeg(threading.Thread):
+    """Reports the progress of an ffmpeg render. ffmpeg writes its -progress reports to
+    stdout, which this thread reads as they arrive, so nothing is written to or polled from disk.
+    """
+
+    # The callback redraws the progress bar, so reports are coalesced: it only fires once the
+    # render advanced by MIN_STEP (a fraction of the video) or MIN_INTERVAL seconds passed
+    MIN_STEP = 0.01
+    MIN_INTERVAL = 0.5
+
     def __init__(self, vid_duration_seconds, progress_update_callback):
-        threading.Thread.__init__(self, name="ProgressFfmpeg")
+        threading.Thread.__init__(self, name="ProgressFfmpeg", daemon=True)
         self.stop_event = threading.Event()
-        self.output_file = tempfile.NamedTemporaryFile(mode="w+", delete=False)
+        self.progress_stream = None
         self.vid_duration_seconds = vid_duration_seconds
         self.progress_update_callback = progress_update_callback
+        self.error = None
 
     def run(self):
-        while not self.stop_event.is_set():
-            latest_progress = self.get_latest_ms_progress()
-            if latest_progress is not None:
-                completed_percent = latest_progress / self.vid_duration_seconds
+        try:
+            self.report_progress()
+        except Exception as e:  # re-raised by render once ffmpeg has finished
+            self.error = e
+        finally:
+            # ffmpeg blocks once the stdout pipe fills, so whatever happened above the rest of
+            # the stream is still read to the end
+            for _ in self.progress_stream:
+                pass
+
+    def report_progress(self):
+        # Every report is a block of key=value lines closed by progress=continue, or by
+        # progress=end after the last one
+        last_percent = 0.0
+        last_update = time.monotonic()
+        record = {}
+        for raw_line in self.progress_stream:
+            if self.stop_event.is_set():
+                break
+            key, _, value = raw_line.decode("utf8", errors="ignore").strip().partition("=")
+            if key != "progress":
+                record[key] = value
+                continue
+            latest_progress = self.get_record_progress(record)
+            record = {}
+            if value == "end":
+                break
+            if latest_progress is None or self.vid_duration_seconds <= 0:
+                continue
+            completed_percent = latest_progress / self.vid_duration_seconds
+            now = time.monotonic()
+            if (
+                completed_percent - last_percent >= self.MIN_STEP
+                or now - last_update >= self.MIN_INTERVAL
+            ):
                 self.progress_update_callback(completed_percent)
-            time.sleep(1)
-
-    def get_latest_ms_progress(self):
-        lines = self.output_file.readlines()
-
-        if lines:
-            for line in lines:
-                if "out_time_ms" in line:
-                    out_time_ms_str = line.split("=")[1].strip()
-                    if out_time_ms_str.isnumeric():
-                        return float(out_time_ms_str) / 1000000.0
-                    else:
-                        # Handle the case when "N/A" is encountered
-                        return None
-        return None
+                last_percent = completed_percent
+                last_update = now
+
+    @staticmethod
+    def get_record_progress(record: Dict[str, str]):
+        # out_time_us is what current ffmpeg builds report; out_time_ms is the older,
+        # misnamed key that also holds microseconds
+        out_time = record.get("out_time_us", record.get("out_time_ms", ""))
+        if out_time.isnumeric():
+            return float(out_time) / 1000000.0
+        else:
+            # Handle the case when "N/A" is encountered
+            return None
+
+    def render(self, output) -> None:
+        """Runs an ffmpeg output while reporting its progress
+        Args:
+            output: The ffmpeg-python output node to run
+        Raises:
+            ffmpeg.Error: If ffmpeg exits with an error, carrying its stderr
+            Exception: Whatever the progress callback raised, once ffmpeg has finished
+        """
+        # -nostats stops the per-frame status line on stderr, which is only read for errors
+        process = output.global_args("-progress", "pipe:1", "-nostats").run_async(
+            pipe_stdout=True, pipe_stderr=True
+        )
+        self.progress_stream = process.stdout
+        self.start()
+        # stderr is drained here while this thread reads stdout, so neither pipe can fill up
+        stderr = process.stderr.read()
+        retcode = process.wait()
+        self.join()
+        if retcode:
+            raise ffmpeg.Error("ffmpeg", None, stderr)
+        if self.error is not None:
+            raise self.error
 
     def stop(self):
         self.stop_event.set()
 
     def __enter__(self):
-        self.start()
         return self
 
     def __exit__(self, *args, **kwargs):
@@ -67,43 +159,201 @@ class ProgressFfmpeg(threading.Thread):
 
 
 def name_normalize(name: str) -> str:
-    name = re.sub(r'[?\\"%*:|<>]', "", name)
-    name = re.sub(r"( [w,W]\s?\/\s?[o,O,0])", r" without", name)
-    name = re.sub(r"( [w,W]\s?\/)", r" with", name)
-    name = re.sub(r"(\d+)\s?\/\s?(\d+)", r"\1 of \2", name)
-    name = re.sub(r"(\w+)\s?\/\s?(\w+)", r"\1 or \2", name)
-    name = re.sub(r"\/", r"", name)
+    name = _FORBIDDEN_CHARS.sub("", name)
+    for pattern, replacement in _SLASH_RULES:
+        name = pattern.sub(replacement, name)
 
     lang = settings.config["reddit"]["thread"]["post_lang"]
-    if lang:
+    # source_lang is optional and blank by default; only an explicit match skips the request
+    if lang and lang != settings.config["reddit"]["thread"].get("source_lang", ""):
         print_substep("Translating filename...")
-        translated_name = translators.translate_text(name, translator="google", to_language=lang)
-        return translated_name
+        return _translate(name, lang)
     else:
         return name
 
 
-def prepare_background(reddit_id: str, W: int, H: int) -> str:
-    # For now, just return the background video as-is
-    # The final composition will handle scaling and overlays
-    background_path = f"assets/temp/{reddit_id}/background.mp4"
-    return background_path
+@lru_cache(maxsize=512)
+def _translate(text: str, lang: str) -> str:
+    # Each translation is an HTTP round-trip, so a repeated title is only sent once
+    return translators.translate_text(text, translator="google", to_language=lang)
+
+
+def probe_files(paths: List[str]) -> Dict[str, dict]:
+    """Runs ffprobe on every path concurrently. Each probe is its own process, so running them
+    side by side hides the spawn overhead instead of paying it once per clip.
+    Args:
+        paths (List[str]): The media files to probe
+    Returns:
+        Dict[str, dict]: The ffprobe output of each path, keyed by path
+    """
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return dict(zip(paths, executor.map(ffmpeg.probe, paths)))
+
+
+def concat_audio(paths: List[str], probes: Dict[str, dict]):
+    """Joins the narration clips into one audio stream. When every clip has the same codec,
+    sample rate and channel layout they are read back to back by the concat demuxer as a single
+    input; otherwise each clip is opened separately and joined with the concat filter.
+    Args:
+        paths (List[str]): The audio files, in playback order
+        probes (Dict[str, dict]): The ffprobe output of each path, as returned by probe_files
+    Returns:
+        The audio stream to use in the final graph
+    """
+
+    def stream_format(path: str) -> Tuple:
+        stream = next(s for s in probes[path]["streams"] if s["codec_type"] == "audio")
+        return stream.get("codec_name"), stream.get("sample_rate"), stream.get("channels")
+
+    if len({stream_format(path) for path in paths}) != 1:
+        return ffmpeg.concat(*[ffmpeg.input(path) for path in paths], a=1, v=0)
+
+    list_path = os.path.join(os.path.dirname(paths[0]), "concat_list.txt")
+    with open(list_path, "w", encoding="utf-8") as concat_list:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            concat_list.write(f"file '{escaped}'\n")
+    return ffmpeg.input(list_path, f="concat", safe=0)["a"]
+
+
+def _enumerate_chunks(dir_path: str, prefix: str, ext: str) -> List[int]:
+    """Lists the indices of the {prefix}_{i}.{ext} files in a directory with a single scandir
+    instead of one stat per candidate file.
+    Args:
+        dir_path (str): The directory to look in
+        prefix (str): The file name before the underscore, e.g. "content"
+        ext (str): The file extension without the dot
+    Returns:
+        List[int]: The indices found, sorted ascending
+    """
+    if not os.path.isdir(dir_path):
+        return []
+    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)\.{re.escape(ext)}$")
+    with os.scandir(dir_path) as entries:
+        return sorted(int(m.group(1)) for e in entries if (m := pattern.match(e.name)))
+
+
+def _encoder_works(encoder: str) -> bool:
+    # ffmpeg builds often list hardware encoders without a device to run them on,
+    # so encode a single blank frame to make sure the encoder actually opens
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=size=256x256",
+            "-frames:v",
+            "1",
+            "-c:v",
+            encoder,
+            "-f",
+            "null",
+            "-",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=None)
+def get_h264_encoder() -> str:
+    """Picks the fastest working H.264 encoder of this machine. The result is cached,
+    so ffmpeg is only queried once per run.
+    Returns:
+        str: The name of the encoder, one of the keys of H264_ENCODERS
+    """
+    try:
+        available = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True
+        ).stdout
+    except OSError:
+        return "libx264"
+    for encoder in H264_ENCODERS:
+        if encoder == "libx264":
+            break
+        if f" {encoder} " in available and _encoder_works(encoder):
+            return encoder
+    return "libx264"
+
+
+def video_encoder_args(encoder: str = None) -> Dict:
+    """Returns the ffmpeg output arguments of an H.264 encoder, by default the selected one"""
+    encoder = encoder or get_h264_encoder()
+    return {"c:v": encoder, **H264_ENCODERS[encoder]}
+
+
+def render_video(build_video, audio, path: str, length: float, progress_update_callback) -> None:
+    """Encodes the final video in one ffmpeg run. If a hardware encoder fails part-way
+    (driver limits, busy device), the render is retried once with libx264.
+    Args:
+        build_video: Called with the encoder of each attempt; returns the video stream of the
+            final graph, so input options such as hwaccel can follow the encoder
+        audio: The audio stream of the final graph
+        path (str): The output file
+        length (float): The length of the video in seconds
+        progress_update_callback: Called with the completed fraction as the render advances
+    Raises:
+        ffmpeg.Error: If the render fails with libx264
+    """
+
+    def run(encoder: str = None) -> None:
+        encoder = encoder or get_h264_encoder()
+        with ProgressFfmpeg(length, progress_update_callback) as progress:
+            progress.render(
+                ffmpeg.output(
+                    build_video(encoder),
+                    audio,
+                    path,
+                    f="mp4",
+                    t=length,
+                    **video_encoder_args(encoder),
+                    **{"b:a": "192k"},
+                ).overwrite_output()
+            )
+
+    try:
+        run()
+    except ffmpeg.Error:
+        if get_h264_encoder() == "libx264":
+            raise
+        print_substep(f"{get_h264_encoder()} failed, retrying with libx264", style="bold red")
+        run("libx264")
 
 
 def create_fancy_thumbnail(image, text, text_color, padding, wrap=35):
     print_step(f"Creating fancy thumbnail for: {text}")
     font_title_size = 47
-    font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), font_title_size)
+    y_offset = 30
     image_width, image_height = image.size
     lines = textwrap.wrap(text, width=wrap)
+
+    if len(lines) == 3:
+        lines = textwrap.wrap(text, width=wrap + 10)
+        font_title_size = 40
+        y_offset = 35
+    elif len(lines) == 4:
+        lines = textwrap.wrap(text, width=wrap + 10)
+        font_title_size = 35
+        y_offset = 40
+    elif len(lines) > 4:
+        lines = textwrap.wrap(text, width=wrap + 10)
+        font_title_size = 30
+        y_offset = 30
+
+    font = load_font(os.path.join("fonts", "Roboto-Bold.ttf"), font_title_size)
+    # Every line advances by the same font height, so measure it once
+    line_height = getheight(font, text)
     y = (
         (image_height / 2)
-        - (((getheight(font, text) + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
-        + 30
+        - (((line_height + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
+        + y_offset
     )
     draw = ImageDraw.Draw(image)
 
-    username_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 30)
+    username_font = load_font(os.path.join("fonts", "Roboto-Bold.ttf"), 30)
     draw.text(
         (205, 825),
         settings.config["settings"]["channel_name"],
@@ -112,37 +362,9 @@ def create_fancy_thumbnail(image, text, text_color, padding, wrap=35):
         align="left",
     )
 
-    if len(lines) == 3:
-        lines = textwrap.wrap(text, width=wrap + 10)
-        font_title_size = 40
-        font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), font_title_size)
-        y = (
-            (image_height / 2)
-            - (((getheight(font, text) + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
-            + 35
-        )
-    elif len(lines) == 4:
-        lines = textwrap.wrap(text, width=wrap + 10)
-        font_title_size = 35
-        font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), font_title_size)
-        y = (
-            (image_height / 2)
-            - (((getheight(font, text) + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
-            + 40
-        )
-    elif len(lines) > 4:
-        lines = textwrap.wrap(text, width=wrap + 10)
-        font_title_size = 30
-        font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), font_title_size)
-        y = (
-            (image_height / 2)
-            - (((getheight(font, text) + (len(lines) * padding) / len(lines)) * len(lines)) / 2)
-            + 30
-        )
-
     for line in lines:
         draw.text((120, y), line, font=font, fill=text_color, align="left")
-        y += getheight(font, line) + padding
+        y += line_height + padding
 
     return image
 
@@ -150,7 +372,7 @@ def create_fancy_thumbnail(image, text, text_color, padding, wrap=35):
 def merge_background_audio(audio: ffmpeg, reddit_id: str):
     """Gather an audio and merge with assets/backgrounds/background.mp3
     Args:
-        audio (ffmpeg): The TTS final audio but without background.
+        audio (ffmpeg): The TTS final audio stream (e.g. the concat node) but without background.
         reddit_id (str): The ID of subreddit
     """
     background_audio_volume = settings.config["settings"]["background"]["background_audio_volume"]
@@ -167,6 +389,50 @@ def merge_background_audio(audio: ffmpeg, reddit_id: str):
         return merged_audio  # Return merged audio
 
 
+def build_thumbnail(reddit_id: str, subreddit: str, title: str) -> None:
+    """Creates assets/temp/{reddit_id}/thumbnail.png if background thumbnails are enabled
+    Args:
+        reddit_id (str): The sanitized thread id
+        subreddit (str): The subreddit, which names the results folder
+        title (str): The thread title to write on the thumbnail
+    """
+    settingsbackground = settings.config["settings"]["background"]
+    if not settingsbackground["background_thumbnail"]:
+        return
+
+    # Runs beside make_final_video, which may create ./results/{subreddit} at the same time
+    if not exists(f"./results/{subreddit}/thumbnails"):
+        print_substep(
+            "The 'results/thumbnails' folder could not be found so it was automatically created."
+        )
+        os.makedirs(f"./results/{subreddit}/thumbnails", exist_ok=True)
+    # get the first file with the .png extension from assets/backgrounds and use it as a background for the thumbnail
+    first_image = next(
+        (file for file in os.listdir("assets/backgrounds") if file.endswith(".png")),
+        None,
+    )
+    if first_image is None:
+        print_substep("No png files found in assets/backgrounds", "red")
+
+    else:
+        font_family = settingsbackground["background_thumbnail_font_family"]
+        font_size = settingsbackground["background_thumbnail_font_size"]
+        font_color = settingsbackground["background_thumbnail_font_color"]
+        thumbnail = Image.open(f"assets/backgrounds/{first_image}")
+        width, height = thumbnail.size
+        thumbnailSave = create_thumbnail(
+            thumbnail,
+            font_family,
+            font_size,
+            font_color,
+            width,
+            height,
+            title,
+        )
+        thumbnailSave.save(f"./assets/temp/{reddit_id}/thumbnail.png")
+        print_substep(f"Thumbnail - Building Thumbnail in assets/temp/{reddit_id}/thumbnail.png")
+
+
 def make_final_video(
     number_of_clips: int,
     length: int,
@@ -195,18 +461,30 @@ def make_final_video(
 
     print_step("Creating the final video 🎥")
 
-    background_clip = ffmpeg.input(prepare_background(reddit_id, W=W, H=H))
+    title = re.sub(r"[^\w\s-]", "", reddit_obj["thread_title"])
+    idx = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
+    subreddit = settings.config["reddit"]["thread"]["subreddit"]
+
+    # Neither the filename (which may need a translation request) nor the thumbnail feeds the
+    # filter graph, so both are prepared on worker threads while the graph is built
+    side_tasks = ThreadPoolExecutor(max_workers=2)
+    filename_future = side_tasks.submit(name_normalize, title)
+    thumbnail_future = side_tasks.submit(
+        build_thumbnail, reddit_id, subreddit, reddit_obj["thread_title"]
+    )
+    side_tasks.shutdown(wait=False)
+
+    background_path = f"assets/temp/{reddit_id}/background.mp4"
+    if not os.path.isfile(background_path):
+        raise FileNotFoundError(f"Background video not found: {background_path}")
 
-    # Gather all audio clips
-    audio_clips = list()
-    
     # Calculate actual number of content clips based on images, not all audio files
     actual_content_clips = 0
     if settings.config["settings"]["storymode"] and settings.config["settings"]["storymodemethod"] == 1:
-        i = 0
-        while os.path.exists(f"assets/temp/{reddit_id}/png/content_{i}.png"):
+        # Only the unbroken run content_0, content_1, ... is used, as the audio is paired by index
+        content_indices = set(_enumerate_chunks(f"assets/temp/{reddit_id}/png", "content", "png"))
+        while actual_content_clips in content_indices:
             actual_content_clips += 1
-            i += 1
     
     if actual_content_clips == 0 and settings.config["settings"]["storymode"] == "false":
         print(
@@ -216,186 +494,120 @@ def make_final_video(
 
     if settings.config["settings"]["storymode"]:
         if settings.config["settings"]["storymodemethod"] == 0:
-            audio_clips = [ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3")]
-            audio_clips.insert(1, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio.mp3"))
+            audio_paths = [
+                f"assets/temp/{reddit_id}/mp3/title.mp3",
+                f"assets/temp/{reddit_id}/mp3/postaudio.mp3",
+            ]
         elif settings.config["settings"]["storymodemethod"] == 1:
             # Only collect audio clips for title + the content images we have
-            audio_clips = [ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3")]
-            for i in range(actual_content_clips):
-                audio_clips.append(ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3"))
-
+            audio_paths = [f"assets/temp/{reddit_id}/mp3/title.mp3"] + [
+                f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3" for i in range(actual_content_clips)
+            ]
     else:
-        audio_clips = [
-            ffmpeg.input(f"assets/temp/{reddit_id}/mp3/{i}.mp3") for i in range(number_of_clips)
+        audio_paths = [f"assets/temp/{reddit_id}/mp3/title.mp3"] + [
+            f"assets/temp/{reddit_id}/mp3/{i}.mp3" for i in range(number_of_clips)
         ]
-        audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"))
 
-        audio_clips_durations = [
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/{i}.mp3")["format"]["duration"])
-            for i in range(number_of_clips)
-        ]
-        audio_clips_durations.insert(
-            0,
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"]),
-        )
+    # Probe every clip once, up front; the overlay timeline below reuses these durations
+    audio_probes = probe_files(audio_paths)
+    audio_clips_durations = [float(audio_probes[p]["format"]["duration"]) for p in audio_paths]
+    console.log(f"[bold green] Video Will Be: {sum(audio_clips_durations)} Seconds Long")
 
-        for i in range(actual_content_clips):
-            audio_clips_durations.append(
-                float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")["format"]["duration"])
-            )
-        
-        console.log(f"[bold green] Video Will Be: {sum(audio_clips_durations)} Seconds Long")
-
-    audio_concat = ffmpeg.concat(*audio_clips, a=1, v=0)
-    ffmpeg.output(
-        audio_concat, f"assets/temp/{reddit_id}/audio.mp3", **{"b:a": "192k"}
-    ).overwrite_output().run(quiet=True)
+    # Kept as a node of the final graph instead of being encoded to an intermediate mp3
+    audio = concat_audio(audio_paths, audio_probes)
 
     screenshot_width = int((W * 45) // 100)
-    audio = ffmpeg.input(f"assets/temp/{reddit_id}/audio.mp3")
     final_audio = merge_background_audio(audio, reddit_id)
 
-    image_clips = list()
-
     Path(f"assets/temp/{reddit_id}/png").mkdir(parents=True, exist_ok=True)
 
-    # Use the title image already created by our dream generator
-    image_clips.insert(
-        0,
-        ffmpeg.input(f"assets/temp/{reddit_id}/png/title.png")["v"].filter(
+    def scaled_image(name: str):
+        return ffmpeg.input(f"assets/temp/{reddit_id}/png/{name}.png")["v"].filter(
             "scale", screenshot_width, -1
-        ),
-    )
+        )
+
+    # Use the title image already created by our dream generator
+    title_image = scaled_image("title")
 
+    # (start, end, image) for every overlay; the clips follow each other back to back
+    overlay_schedule = []
     current_time = 0
     if settings.config["settings"]["storymode"]:
-        # Only get audio durations for the images we actually have (title + content images)
-        audio_clips_durations = [
-            float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"])
-        ]
-        for i in range(actual_content_clips):
-            audio_clips_durations.append(
-                float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")["format"]["duration"])
-            )
-        
-        if settings.config["settings"]["storymodemethod"] == 0:
-            image_clips.insert(
-                1,
-                ffmpeg.input(f"assets/temp/{reddit_id}/png/story_content.png").filter(
-                    "scale", screenshot_width, -1
-                ),
-            )
-            background_clip = background_clip.overlay(
-                image_clips[0],
-                enable=f"between(t,{current_time},{current_time + audio_clips_durations[0]})",
-                x="(main_w-overlay_w)/2",
-                y="(main_h-overlay_h)/2",
-            )
-            current_time += audio_clips_durations[0]
-        elif settings.config["settings"]["storymodemethod"] == 1:
-            # Show title image first
-            background_clip = background_clip.overlay(
-                image_clips[0],  # Title image
-                enable=f"between(t,{current_time},{current_time + audio_clips_durations[0]})",
-                x="(main_w-overlay_w)/2",
-                y="(main_h-overlay_h)/2",
-            )
-            current_time += audio_clips_durations[0]
-            
+        # Show title image first
+        overlay_schedule.append((current_time, current_time + audio_clips_durations[0], title_image))
+        current_time += audio_clips_durations[0]
+
+        if settings.config["settings"]["storymodemethod"] == 1:
             for i in track(range(actual_content_clips), "Collecting the image files..."):
-                image_clips.append(
-                    ffmpeg.input(f"assets/temp/{reddit_id}/png/content_{i}.png")["v"].filter(
-                        "scale", screenshot_width, -1
+                overlay_schedule.append(
+                    (
+                        current_time,
+                        current_time + audio_clips_durations[i + 1],  # +1 because index 0 is title
+                        scaled_image(f"content_{i}"),
                     )
                 )
-                background_clip = background_clip.overlay(
-                    image_clips[i + 1],  # +1 because index 0 is title
-                    enable=f"between(t,{current_time},{current_time + audio_clips_durations[i + 1]})",
-                    x="(main_w-overlay_w)/2",
-                    y="(main_h-overlay_h)/2",
-                )
                 current_time += audio_clips_durations[i + 1]
     else:
+        assert (
+            audio_clips_durations is not None
+        ), "Please make a GitHub issue if you see this. Ping @JasonLovesDoggo on GitHub."
         for i in range(0, number_of_clips + 1):
-            image_clips.append(
-                ffmpeg.input(f"assets/temp/{reddit_id}/png/comment_{i}.png")["v"].filter(
-                    "scale", screenshot_width, -1
-                )
-            )
-            image_overlay = image_clips[i].filter("colorchannelmixer", aa=opacity)
-            assert (
-                audio_clips_durations is not None
-            ), "Please make a GitHub issue if you see this. Ping @JasonLovesDoggo on GitHub."
-            background_clip = background_clip.overlay(
-                image_overlay,
-                enable=f"between(t,{current_time},{current_time + audio_clips_durations[i]})",
-                x="(main_w-overlay_w)/2",
-                y="(main_h-overlay_h)/2",
+            # The title comes first, then comment_0 for the first comment's audio and so on
+            image = title_image if i == 0 else scaled_image(f"comment_{i - 1}")
+            image_overlay = image.filter("colorchannelmixer", aa=opacity)
+            overlay_schedule.append(
+                (current_time, current_time + audio_clips_durations[i], image_overlay)
             )
             current_time += audio_clips_durations[i]
 
-    title = re.sub(r"[^\w\s-]", "", reddit_obj["thread_title"])
-    idx = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
-    title_thumb = reddit_obj["thread_title"]
-
-    filename = f"{name_normalize(title)[:251]}"
-    subreddit = settings.config["reddit"]["thread"]["subreddit"]
+    filename = f"{filename_future.result()[:251]}"
 
     if not exists(f"./results/{subreddit}"):
         print_substep("The 'results' folder could not be found so it was automatically created.")
-        os.makedirs(f"./results/{subreddit}")
+        os.makedirs(f"./results/{subreddit}", exist_ok=True)
 
     if not exists(f"./results/{subreddit}/OnlyTTS") and allowOnlyTTSFolder:
         print_substep("The 'OnlyTTS' folder could not be found so it was automatically created.")
-        os.makedirs(f"./results/{subreddit}/OnlyTTS")
-
-    # create a thumbnail for the video
-    settingsbackground = settings.config["settings"]["background"]
-
-    if settingsbackground["background_thumbnail"]:
-        if not exists(f"./results/{subreddit}/thumbnails"):
-            print_substep(
-                "The 'results/thumbnails' folder could not be found so it was automatically created."
+        os.makedirs(f"./results/{subreddit}/OnlyTTS", exist_ok=True)
+
+    def build_video(encoder: str):
+        """Builds the video stream of the final graph for one encoding attempt"""
+        # Looped by the demuxer so a background shorter than the narration never runs out;
+        # the outputs are capped at the narration length with -t
+        # With NVENC the GPU is known to work, so it decodes the background too. The frames are
+        # still downloaded for the software filters (overlay, drawtext, scale) below. The
+        # libx264 fallback decodes on the CPU, so a CUDA failure can't sink it as well
+        background_input_args = {"hwaccel": "cuda"} if encoder == "h264_nvenc" else {}
+        background_clip = ffmpeg.input(background_path, stream_loop=-1, **background_input_args)
+
+        # Half-open windows, so a clip is already gone on the frame where the next one starts.
+        # Each image input is a single frame, so it is decoded and scaled exactly once; overlay
+        # keeps compositing that last frame (eof_action=repeat) for the rest of the video
+        for start, end, image in overlay_schedule:
+            background_clip = background_clip.overlay(
+                image,
+                enable=f"gte(t,{start})*lt(t,{end})",
+                eof_action="repeat",
+                x="(main_w-overlay_w)/2",
+                y="(main_h-overlay_h)/2",
             )
-            os.makedirs(f"./results/{subreddit}/thumbnails")
-        # get the first file with the .png extension from assets/backgrounds and use it as a background for the thumbnail
-        first_image = next(
-            (file for file in os.listdir("assets/backgrounds") if file.endswith(".png")),
-            None,
+
+        text = f"Background by {background_config['video'][2]}"
+        background_clip = ffmpeg.drawtext(
+            background_clip,
+            text=text,
+            x=f"(w-text_w)",
+            y=f"(h-text_h)",
+            fontsize=5,
+            fontcolor="White",
+            fontfile=os.path.join("fonts", "Roboto-Regular.ttf"),
         )
-        if first_image is None:
-            print_substep("No png files found in assets/backgrounds", "red")
+        background_clip = background_clip.filter("scale", W, H)
+        return background_clip
 
-        else:
-            font_family = settingsbackground["background_thumbnail_font_family"]
-            font_size = settingsbackground["background_thumbnail_font_size"]
-            font_color = settingsbackground["background_thumbnail_font_color"]
-            thumbnail = Image.open(f"assets/backgrounds/{first_image}")
-            width, height = thumbnail.size
-            thumbnailSave = create_thumbnail(
-                thumbnail,
-                font_family,
-                font_size,
-                font_color,
-                width,
-                height,
-                title_thumb,
-            )
-            thumbnailSave.save(f"./assets/temp/{reddit_id}/thumbnail.png")
-            print_substep(f"Thumbnail - Building Thumbnail in assets/temp/{reddit_id}/thumbnail.png")
-
-    text = f"Background by {background_config['video'][2]}"
-    background_clip = ffmpeg.drawtext(
-        background_clip,
-        text=text,
-        x=f"(w-text_w)",
-        y=f"(h-text_h)",
-        fontsize=5,
-        fontcolor="White",
-        fontfile=os.path.join("fonts", "Roboto-Regular.ttf"),
-    )
-    background_clip = background_clip.filter("scale", W, H)
+    thumbnail_future.result()
     print_step("Rendering the video 🎥")
+    print_substep(f"Encoding with {get_h264_encoder()}")
     from tqdm import tqdm
 
     pbar = tqdm(total=100, desc="Progress: ", bar_format="{l_bar}{bar}", unit=" %")
@@ -408,150 +620,15 @@ def make_final_video(
     defaultPath = f"results/{subreddit}"
     actual_length = sum(audio_clips_durations)
     
-    # Simplified approach: create video step by step instead of complex filter chain
-    print_substep("🎬 Creating simplified video composition...")
-    
-    # Step 1: Create a simple video with just background and audio
+    path = defaultPath + f"/{filename}"
+    path = (
+        path[:251] + ".mp4"
+    )  # Prevent a error by limiting the path length, do not change this.
     try:
-        # Get the total audio duration
-        audio_duration = sum(audio_clips_durations)
-        
-        # Create background video with proper duration
-        background_video = ffmpeg.input(f"assets/temp/{reddit_id}/background.mp4").video
-        background_audio_input = ffmpeg.input(f"assets/temp/{reddit_id}/background.mp3").audio
-        main_audio = ffmpeg.input(f"assets/temp/{reddit_id}/audio.mp3").audio
-        
-        # Mix the audio
-        if settings.config["settings"]["background"]["background_audio_volume"] > 0:
-            bg_audio_volume = settings.config["settings"]["background"]["background_audio_volume"]
-            mixed_audio = ffmpeg.filter([main_audio, background_audio_input.filter("volume", bg_audio_volume)], "amix", duration="longest")
-        else:
-            mixed_audio = main_audio
-        
-        # Scale background to target resolution and loop it for the duration
-        scaled_background = background_video.filter("scale", W, H).filter("loop", loop=-1, size=int(audio_duration * 25), start=0)
-        
-        # Add text overlay for credit
-        credit_text = f"Background by {background_config['video'][2]}"
-        final_video = scaled_background.drawtext(
-            text=credit_text,
-            x=f"(w-text_w)",
-            y=f"(h-text_h)", 
-            fontsize=5,
-            fontcolor="White",
-            fontfile=os.path.join("fonts", "Roboto-Regular.ttf")
-        )
-        
-        # Create final output
-        path = defaultPath + f"/{filename}"
-        path = (path[:251] + ".mp4")
-        
-        print_substep(f"🎥 Rendering final video: {filename}")
-        
-        output = ffmpeg.output(
-            final_video,
-            mixed_audio, 
-            path,
-            vcodec="libx264",
-            acodec="aac",
-            pix_fmt="yuv420p",
-            t=audio_duration,
-            **{"b:v": "2M", "b:a": "128k"}
-        ).overwrite_output()
-        
-        output.run(quiet=True)
-        print_substep("✅ Basic video created successfully!")
-        
-        # Now let's try to add the images as overlays in a simpler way
-        if os.path.exists(path):
-            print_substep("🖼️ Adding image overlays...")
-            
-            # Create a version with image overlays
-            path_with_images = defaultPath + f"/{filename.replace('.mp4', '_with_images.mp4')}"
-            
-            # Input the basic video we just created
-            base_video = ffmpeg.input(path).video
-            base_audio = ffmpeg.input(path).audio
-            
-            current_time = 0
-            result_video = base_video
-            
-            # Add title image
-            if os.path.exists(f"assets/temp/{reddit_id}/png/title.png"):
-                title_img = ffmpeg.input(f"assets/temp/{reddit_id}/png/title.png").video.filter("scale", screenshot_width, -1)
-                result_video = result_video.overlay(
-                    title_img,
-                    x="(main_w-overlay_w)/2",
-                    y="(main_h-overlay_h)/2",
-                    enable=f"between(t,{current_time},{current_time + audio_clips_durations[0]})"
-                )
-                current_time += audio_clips_durations[0]
-            
-            # Add content images
-            for i in range(actual_content_clips):
-                if os.path.exists(f"assets/temp/{reddit_id}/png/content_{i}.png"):
-                    content_img = ffmpeg.input(f"assets/temp/{reddit_id}/png/content_{i}.png").video.filter("scale", screenshot_width, -1)
-                    result_video = result_video.overlay(
-                        content_img,
-                        x="(main_w-overlay_w)/2", 
-                        y="(main_h-overlay_h)/2",
-                        enable=f"between(t,{current_time},{current_time + audio_clips_durations[i + 1]})"
-                    )
-                    current_time += audio_clips_durations[i + 1]
-            
-            # Output final video with images
-            final_output = ffmpeg.output(
-                result_video,
-                base_audio,
-                path_with_images,
-                vcodec="libx264", 
-                acodec="aac",
-                pix_fmt="yuv420p",
-                **{"b:v": "2M", "b:a": "128k"}
-            ).overwrite_output()
-            
-            final_output.run(quiet=True)
-            print_substep("✅ Final video with images created successfully!")
-            
-    except Exception as e:
-        print_substep(f"❌ Simplified approach failed: {str(e)}")
-        print_substep("🔄 Trying basic audio-only approach...")
-        
-        # Absolute fallback: just create audio file
-        try:
-            basic_path = defaultPath + f"/audio_only_{filename.replace('.mp4', '.mp3')}"
-            ffmpeg.output(final_audio, basic_path).overwrite_output().run(quiet=True)
-            print_substep("✅ Audio-only version created!")
-        except Exception as audio_e:
-            print_substep(f"❌ Audio creation failed: {str(audio_e)}")
-
-    # Continue with the original complex approach as backup
-    with ProgressFfmpeg(actual_length, on_update_example) as progress:
-        path = defaultPath + f"/{filename}"
-        path = (
-            path[:251] + ".mp4"
-        )  # Prevent a error by limiting the path length, do not change this.
-        try:
-            ffmpeg.output(
-                background_clip,
-                final_audio,
-                path,
-                f="mp4",
-                **{
-                    "c:v": "h264",
-                    "b:v": "20M",
-                    "b:a": "192k",
-                    "threads": multiprocessing.cpu_count(),
-                },
-            ).overwrite_output().global_args("-progress", progress.output_file.name).run(
-                quiet=True,
-                overwrite_output=True,
-                capture_stdout=False,
-                capture_stderr=False,
-            )
-        except ffmpeg.Error as e:
-            print(e.stderr.decode("utf8"))
-            exit(1)
+        render_video(build_video, final_audio, path, actual_length, on_update_example)
+    except ffmpeg.Error as e:
+        print(e.stderr.decode("utf8"))
+        exit(1)
     old_percentage = pbar.n
     pbar.update(100 - old_percentage)
     if allowOnlyTTSFolder:
@@ -560,28 +637,11 @@ def make_final_video(
             path[:251] + ".mp4"
         )  # Prevent a error by limiting the path length, do not change this.
         print_step("Rendering the Only TTS Video 🎥")
-        with ProgressFfmpeg(actual_length, on_update_example) as progress:
-            try:
-                ffmpeg.output(
-                    background_clip,
-                    audio,
-                    path,
-                    f="mp4",
-                    **{
-                        "c:v": "h264",
-                        "b:v": "20M",
-                        "b:a": "192k",
-                        "threads": multiprocessing.cpu_count(),
-                    },
-                ).overwrite_output().global_args("-progress", progress.output_file.name).run(
-                    quiet=True,
-                    overwrite_output=True,
-                    capture_stdout=False,
-                    capture_stderr=False,
-                )
-            except ffmpeg.Error as e:
-                print(e.stderr.decode("utf8"))
-                exit(1)
+        try:
+            render_video(build_video, audio, path, actual_length, on_update_example)
+        except ffmpeg.Error as e:
+            print(e.stderr.decode("utf8"))
+            exit(1)
 
         old_percentage = pbar.n
         pbar.update(100 - old_percentage)
@@ -1,54 +1,178 @@
 import os
+import random
 import re
 import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Final, List
 
-from PIL import Image, ImageDraw, ImageFont
-from rich.progress import track
+import numpy as np
+from PIL import Image, ImageDraw
 
-from TTS.engine_wrapper import process_text
 from utils import settings
 from utils.console import print_step, print_substep
-from utils.fonts import getheight, getsize
+from utils.fonts import ensure_str, getheight, getlength, getsize, load_font_or_default
+
+# Strips a thread id down to characters that are safe in a path
+_ID_SANITIZE: Final[re.Pattern] = re.compile(r"[^\w\s-]")
+# A sentence: a run of anything up to the next terminal punctuation
+_SENTENCE: Final[re.Pattern] = re.compile(r"[^.!?]+")
+
+# Text effects shared by every line drawn; built once here rather than for each line.
+# Shadow layers are (dx, dy, colour), drawn back to front before the outline
+PREMIUM_SHADOW_LAYERS: Final = (
+    (4, 4, (0, 0, 0, 120)),
+    (3, 3, (0, 0, 0, 100)),
+    (2, 2, (0, 0, 0, 80)),
+    (1, 1, (0, 0, 0, 60)),
+)
+DYNAMIC_SHADOW_LAYERS: Final = (
+    (3, 3, (0, 0, 0, 150)),
+    (2, 2, (0, 0, 0, 120)),
+    (1, 1, (0, 0, 0, 100)),
+)
+LARGE_SHADOW_LAYERS: Final = (
+    (4, 4, (0, 0, 0, 140)),
+    (3, 3, (0, 0, 0, 120)),
+    (2, 2, (0, 0, 0, 100)),
+    (1, 1, (0, 0, 0, 80)),
+)
+# The 24 offsets around a glyph that make up a 2 px outline
+OUTLINE_OFFSETS: Final = tuple(
+    (dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if dx != 0 or dy != 0
+)
+
+# Diagonal drop shadows behind the dream titles (3 px) and subtitles/headers (2 px)
+TITLE_SHADOW_OFFSETS: Final = tuple(
+    (dx * offset, dy * offset)
+    for offset in range(1, 4)
+    for dx, dy in ((-1, -1), (1, -1), (-1, 1), (1, 1))
+)
+HEADER_SHADOW_OFFSETS: Final = TITLE_SHADOW_OFFSETS[:8]
+
+
+# Each rendering thread keeps one canvas per image size and clears it between images,
+# instead of allocating a fresh RGBA buffer (8 MB at 1080x1920) per image
+_canvases = threading.local()
+
+
+def blank_canvas(W: int, H: int, fill=(0, 0, 0, 0)) -> Image.Image:
+    """Returns this thread's W x H canvas, cleared to fill (transparent by default). It is
+    reused by the next call for the same size on the same thread, so it must be saved before
+    then."""
+    if not hasattr(_canvases, "images"):
+        _canvases.images = {}
+    canvas = _canvases.images.get((W, H))
+    if canvas is None:
+        canvas = _canvases.images[(W, H)] = Image.new('RGBA', (W, H), fill)
+    else:
+        canvas.paste(fill, (0, 0, W, H))
+    return canvas
+
+
+def text_mask(font, text: str, xy):
+    """Rasterizes text once into an "L" mask.
+
+    Returns:
+        The mask and the top-left corner to stamp it at so it lines up with draw.text(xy, ...)
+    """
+    x, y = xy
+    left, top, right, bottom = font.getbbox(text)
+    # A pixel of slack on each side for the subpixel start and negative bearings
+    mask_x = int(x) + min(left, 0) - 1
+    mask_y = int(y) + min(top, 0) - 1
+    mask = Image.new('L', (right - min(left, 0) + 3, bottom - min(top, 0) + 3), 0)
+    ImageDraw.Draw(mask).text((x - mask_x, y - mask_y), text, font=font, fill=255)
+    return mask, (mask_x, mask_y)
+
+
+def draw_text_layers(draw, xy, text: str, font, layers) -> None:
+    """Draws text once per (dx, dy, fill) layer, back to front. The glyphs are rasterized a
+    single time and the mask is stamped at every offset, so shadows and outlines no longer
+    cost a FreeType pass each."""
+    mask, (x, y) = text_mask(font, text, xy)
+    for fill, group in groupby(layers, key=itemgetter(2)):
+        offsets = [(dx, dy) for dx, dy, _ in group]
+        if len(offsets) == 1:
+            (dx, dy), = offsets
+            draw.bitmap((x + dx, y + dy), mask, fill=fill)
+        else:
+            # Consecutive layers of one colour (outlines, flat shadows) go down as one stamp
+            union, (dx, dy) = union_mask(mask, offsets)
+            draw.bitmap((x + dx, y + dy), union, fill=fill)
+
+
+def union_mask(mask: Image.Image, offsets):
+    """Combines copies of mask shifted by each (dx, dy) the way stamping them one over another
+    would: coverage adds up as 1 - (1 - a)(1 - b), so one blend replaces one per offset.
+
+    Returns:
+        The combined mask and its offset from the original mask's position
+    """
+    min_dx = min(dx for dx, _ in offsets)
+    min_dy = min(dy for _, dy in offsets)
+    width, height = mask.size
+    span_x = max(dx for dx, _ in offsets) - min_dx
+    span_y = max(dy for _, dy in offsets) - min_dy
+    uncovered = np.ones((height + span_y, width + span_x), dtype=np.float32)
+    clear = 1 - np.asarray(mask, dtype=np.float32) / 255
+    for dx, dy in offsets:
+        top, left = dy - min_dy, dx - min_dx
+        uncovered[top:top + height, left:left + width] *= clear
+    union = np.rint(255 * (1 - uncovered)).astype(np.uint8)
+    return Image.fromarray(union), (min_dx, min_dy)
+
+
+@lru_cache(maxsize=8)
+def gradient_panel(width: int, height: int, top: tuple, bottom: tuple, alpha: int) -> Image.Image:
+    """Builds the vertical gradient behind a text area in one go, fading from the top colour
+    to the bottom colour. Like the 1 px rectangles it replaces, it covers both corners of the
+    box, so it is (width + 1) x (height + 1) and the last row repeats the one above it.
+    """
+    ratio = np.minimum(np.arange(height + 1), height - 1) / height
+    rgb = np.outer(1 - ratio, top) + np.outer(ratio, bottom)
+    panel = np.empty((height + 1, width + 1, 4), dtype=np.uint8)
+    panel[..., :3] = rgb.astype(np.uint8)[:, None, :]
+    panel[..., 3] = alpha
+    return Image.fromarray(panel)
 
 
 def draw_multiline_text_with_styling(
     image, text, font, text_color, padding, wrap=50, transparent=False, 
-    title_font=None, title_color=None
+    title_font=None, title_color=None, draw=None, area=None
 ) -> None:
     """
-    Draw multiline text over given image with improved styling for dream content
+    Draw multiline text over given image with improved styling for dream content.
+    The text is centred in area, a (left, top, width, height) box that defaults to the whole
+    image; pass the image's existing draw to reuse it
     """
-    # Ensure text is a string
-    if isinstance(text, list):
-        text = " ".join(str(item) for item in text)
-    elif not isinstance(text, str):
-        text = str(text) if text is not None else ""
+    text = ensure_str(text)
     
-    draw = ImageDraw.Draw(image)
+    draw = draw or ImageDraw.Draw(image)
     font_height = getheight(font, text)
-    image_width, image_height = image.size
+    area_left, area_top, area_width, area_height = area or (0, 0, *image.size)
     lines = textwrap.wrap(text, width=wrap)
     
     # Calculate total text height
     total_height = (font_height + padding) * len(lines)
-    y = (image_height - total_height) / 2
+    y = area_top + (area_height - total_height) / 2
+    if area:
+        # Text taller than the area starts at its top rather than running over what is above it
+        y = max(y, area_top)
+    
+    # Shadow for better readability on transparent backgrounds, then the main text
+    shadow_offsets = TITLE_SHADOW_OFFSETS if transparent else ()
+    layers = (*((dx, dy, "black") for dx, dy in shadow_offsets), (0, 0, text_color))
     
     for line in lines:
         line_width, line_height = getsize(font, line)
-        x = (image_width - line_width) / 2
-        
-        if transparent:
-            # Add shadow for better readability on transparent backgrounds
-            shadow_color = "black"
-            for offset in range(1, 4):
-                for dx, dy in [(-offset, -offset), (offset, -offset), 
-                              (-offset, offset), (offset, offset)]:
-                    draw.text((x + dx, y + dy), line, font=font, fill=shadow_color)
+        x = area_left + (area_width - line_width) / 2
         
-        # Draw the main text
-        draw.text((x, y), line, font=font, fill=text_color)
+        draw_text_layers(draw, (x, y), line, font, layers)
         y += line_height + padding
 
 
@@ -56,21 +180,16 @@ def create_dream_title_image(reddit_object: dict, theme, text_color, transparent
     """
     Create a title image for the dream post
     """
-    reddit_id = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
+    reddit_id = _ID_SANITIZE.sub("", reddit_object["thread_id"])
     
     # Ensure directory exists
     Path(f"assets/temp/{reddit_id}/png").mkdir(parents=True, exist_ok=True)
     
     # Load fonts
-    try:
-        title_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 120)
-        subtitle_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 60)
-    except:
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
+    title_font = load_font_or_default(os.path.join("fonts", "Roboto-Bold.ttf"), 120)
+    subtitle_font = load_font_or_default(os.path.join("fonts", "Roboto-Regular.ttf"), 60)
     
-    size = (1920, 1080)
-    image = Image.new("RGBA", size, theme)
+    image = blank_canvas(1920, 1080, theme)
     
     # Process the title
     title_text = reddit_object["thread_title"]
@@ -81,28 +200,25 @@ def create_dream_title_image(reddit_object: dict, theme, text_color, transparent
     subtitle = "✨ Dream Story ✨"
     
     # Draw title
+    draw = ImageDraw.Draw(image)
     draw_multiline_text_with_styling(
         image, title_text, title_font, text_color, 
-        padding=20, wrap=25, transparent=transparent
+        padding=20, wrap=25, transparent=transparent, draw=draw
     )
     
     # Add subtitle at the bottom
-    draw = ImageDraw.Draw(image)
     subtitle_width, subtitle_height = getsize(subtitle_font, subtitle)
     x = (1920 - subtitle_width) / 2
     y = 1080 - subtitle_height - 100
     
-    if transparent:
-        for offset in range(1, 3):
-            for dx, dy in [(-offset, -offset), (offset, -offset), 
-                          (-offset, offset), (offset, offset)]:
-                draw.text((x + dx, y + dy), subtitle, font=subtitle_font, fill="black")
-    
-    draw.text((x, y), subtitle, font=subtitle_font, fill=text_color)
+    layers = HEADER_SHADOW_OFFSETS if transparent else ()
+    draw_text_layers(draw, (x, y), subtitle, subtitle_font, [
+        *((dx, dy, "black") for dx, dy in layers), (0, 0, text_color)
+    ])
     
     # Save the image
     image_path = f"assets/temp/{reddit_id}/png/title.png"
-    image.save(image_path)
+    image.save(image_path, "PNG", compress_level=1)
     return image_path
 
 
@@ -110,16 +226,18 @@ def create_dream_content_images(reddit_object: dict, theme, text_color, transpar
     """
     Create images for dream content text, breaking it into readable chunks
     """
-    reddit_id = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
+    # The TTS wrapper pulls in moviepy and the translators client, and rich.progress its live
+    # display; only the dream renderers need them, so the chunked image path skips them
+    from rich.progress import track
+
+    from TTS.engine_wrapper import process_text
+    
+    reddit_id = _ID_SANITIZE.sub("", reddit_object["thread_id"])
     
     # Get the main post content (the dream)
     if "thread_post" in reddit_object and reddit_object["thread_post"]:
-        dream_text = reddit_object["thread_post"]
         # Handle case where thread_post might be a list
-        if isinstance(dream_text, list):
-            dream_text = " ".join(str(item) for item in dream_text)
-        elif not isinstance(dream_text, str):
-            dream_text = str(dream_text)
+        dream_text = ensure_str(reddit_object["thread_post"])
     elif reddit_object.get("comments") and len(reddit_object["comments"]) > 0:
         # If no post content, use the first comment as the dream
         dream_text = reddit_object["comments"][0]["comment_body"]
@@ -130,44 +248,23 @@ def create_dream_content_images(reddit_object: dict, theme, text_color, transpar
     dream_text = process_text(dream_text, False)
     
     # Load fonts
-    try:
-        content_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 90)
-    except:
-        content_font = ImageFont.load_default()
-    
-    size = (1920, 1080)
+    content_font = load_font_or_default(os.path.join("fonts", "Roboto-Regular.ttf"), 90)
     
     # Split text into chunks that fit nicely on screen
     # Each chunk should be roughly 400-600 characters for good readability
     max_chars_per_image = 500
-    text_chunks = []
     
     if len(dream_text) <= max_chars_per_image:
         text_chunks = [dream_text]
     else:
         # Split by sentences first, then group into chunks
-        sentences = re.split(r'[.!?]+', dream_text)
-        current_chunk = ""
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            if len(current_chunk + sentence) <= max_chars_per_image:
-                current_chunk += sentence + ". "
-            else:
-                if current_chunk:
-                    text_chunks.append(current_chunk.strip())
-                current_chunk = sentence + ". "
-        
-        if current_chunk:
-            text_chunks.append(current_chunk.strip())
+        sentences = (match.group().strip() for match in _SENTENCE.finditer(dream_text))
+        text_chunks = list(pack_sentences(
+            (sentence for sentence in sentences if sentence), max_chars_per_image
+        ))
     
-    # Create images for each chunk
-    image_paths = []
-    for idx, chunk in enumerate(track(text_chunks, "Creating dream content images...")):
-        image = Image.new("RGBA", size, theme)
+    def render_chunk(idx: int, chunk: str) -> str:
+        image = blank_canvas(1920, 1080, theme)
         
         draw_multiline_text_with_styling(
             image, chunk, content_font, text_color, 
@@ -175,10 +272,14 @@ def create_dream_content_images(reddit_object: dict, theme, text_color, transpar
         )
         
         image_path = f"assets/temp/{reddit_id}/png/content_{idx}.png"
-        image.save(image_path)
-        image_paths.append(image_path)
+        image.save(image_path, "PNG", compress_level=1)
+        return image_path
     
-    return image_paths
+    # Create images for each chunk. They are independent and Pillow releases the GIL while
+    # it rasterizes and compresses, so they are rendered side by side
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        rendered = executor.map(render_chunk, range(len(text_chunks)), text_chunks)
+        return list(track(rendered, "Creating dream content images...", total=len(text_chunks)))
 
 
 def create_dream_comment_images(reddit_object: dict, theme, text_color, 
@@ -186,27 +287,24 @@ def create_dream_comment_images(reddit_object: dict, theme, text_color,
     """
     Create images for dream-related comments (analysis, interpretations, etc.)
     """
-    reddit_id = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
+    from rich.progress import track
+
+    from TTS.engine_wrapper import process_text
+    
+    reddit_id = _ID_SANITIZE.sub("", reddit_object["thread_id"])
     
     if not reddit_object.get("comments"):
         return []
     
     # Load fonts
-    try:
-        comment_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 75)
-        header_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 85)
-    except:
-        comment_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-    
-    size = (1920, 1080)
-    image_paths = []
+    comment_font = load_font_or_default(os.path.join("fonts", "Roboto-Regular.ttf"), 75)
+    header_font = load_font_or_default(os.path.join("fonts", "Roboto-Bold.ttf"), 85)
     
     # Process comments (limit to max_comments)
     comments_to_process = reddit_object["comments"][:max_comments]
     
-    for idx, comment in enumerate(track(comments_to_process, "Creating comment images...")):
-        image = Image.new("RGBA", size, theme)
+    def render_comment(idx: int, comment: dict) -> str:
+        image = blank_canvas(1920, 1080, theme)
         
         # Add a header
         header_text = f"💭 Dream Analysis #{idx + 1}"
@@ -224,32 +322,26 @@ def create_dream_comment_images(reddit_object: dict, theme, text_color,
         header_x = (1920 - header_width) / 2
         header_y = 150
         
-        if transparent:
-            for offset in range(1, 3):
-                for dx, dy in [(-offset, -offset), (offset, -offset), 
-                              (-offset, offset), (offset, offset)]:
-                    draw.text((header_x + dx, header_y + dy), header_text, 
-                             font=header_font, fill="black")
-        
-        draw.text((header_x, header_y), header_text, font=header_font, fill=text_color)
-        
-        # Draw comment content below header
-        content_y_start = header_y + header_height + 80
-        content_image = Image.new("RGBA", (1920, 1080 - int(content_y_start)), theme)
+        layers = HEADER_SHADOW_OFFSETS if transparent else ()
+        draw_text_layers(draw, (header_x, header_y), header_text, header_font, [
+            *((dx, dy, "black") for dx, dy in layers), (0, 0, text_color)
+        ])
         
+        # Draw comment content below header, straight onto the image
+        content_y_start = int(header_y + header_height + 80)
         draw_multiline_text_with_styling(
-            content_image, comment_text, comment_font, text_color, 
-            padding=12, wrap=40, transparent=transparent
+            image, comment_text, comment_font, text_color, 
+            padding=12, wrap=40, transparent=transparent, draw=draw,
+            area=(0, content_y_start, 1920, 1080 - content_y_start)
         )
         
-        # Paste the content image onto the main image
-        image.paste(content_image, (0, int(content_y_start)), content_image)
-        
         image_path = f"assets/temp/{reddit_id}/png/comment_{idx}.png"
-        image.save(image_path)
-        image_paths.append(image_path)
+        image.save(image_path, "PNG", compress_level=1)
+        return image_path
     
-    return image_paths
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        rendered = executor.map(render_comment, range(len(comments_to_process)), comments_to_process)
+        return list(track(rendered, "Creating comment images...", total=len(comments_to_process)))
 
 
 def generate_dream_images(reddit_obj: dict):
@@ -269,21 +361,25 @@ def generate_dream_images(reddit_obj: dict):
     
     # Get post content and split into larger, easier-to-sync chunks
     post_content = reddit_obj.get("thread_post", "")
-    if post_content:
-        # Create larger chunks (3-5 chunks total, 20-40 words each)
-        large_chunks = create_large_text_chunks(post_content)
-        
-        for i, chunk in enumerate(large_chunks):
-            create_large_text_image(chunk, f"content_{i}", reddit_id, W, H)
-            if i >= 5:  # Limit to 5 chunks max
-                break
+    # Create larger chunks (3-5 chunks total, 20-40 words each), capped before any is rendered
+    large_chunks = create_large_text_chunks(post_content)[:5] if post_content else []
+    if large_chunks:
+        # The chunks are independent images and Pillow releases the GIL while it blurs,
+        # composites and compresses, so they are rendered side by side
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [
+                executor.submit(create_large_text_image, chunk, f"content_{i}", reddit_id, W, H)
+                for i, chunk in enumerate(large_chunks)
+            ]
+            for future in futures:
+                future.result()
     
-    print_substep(f"Generated {min(len(large_chunks), 5)} large text chunks - easy to sync!")
+    print_substep(f"Generated {len(large_chunks)} large text chunks - easy to sync!")
 
 def create_title_image(title: str, reddit_id: str, W: int, H: int):
     """Create a gorgeous title image with premium styling"""
     # Create base image
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
+    img = blank_canvas(W, H)
     draw = ImageDraw.Draw(img)
     
     # Create beautiful gradient background - smaller and more elegant
@@ -307,12 +403,12 @@ def create_title_image(title: str, reddit_id: str, W: int, H: int):
     # Add elegant decorative elements
     add_premium_decorations(draw, W, H)
     
-    img.save(f"assets/temp/{reddit_id}/png/title.png", "PNG")
+    img.save(f"assets/temp/{reddit_id}/png/title.png", "PNG", compress_level=1)
 
 def create_content_image(text: str, filename: str, reddit_id: str, W: int, H: int):
     """Create elegant content images with smaller, prettier text boxes"""
     # Create transparent base
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
+    img = blank_canvas(W, H)
     draw = ImageDraw.Draw(img)
     
     # Calculate smaller, more elegant text area
@@ -363,7 +459,7 @@ def create_content_image(text: str, filename: str, reddit_id: str, W: int, H: in
     add_premium_text(draw, text, W, H, is_title=False, 
                     text_area_bounds=(x_start, y_start, text_area_width, text_area_height))
     
-    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG")
+    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG", compress_level=1)
 
 def add_premium_text(draw, text: str, W: int, H: int, is_title: bool = False, text_area_bounds=None):
     """Add premium styled text with beautiful typography"""
@@ -387,13 +483,10 @@ def add_premium_text(draw, text: str, W: int, H: int, is_title: bool = False, te
             max_width = W - 160
     
     # Load premium font
-    try:
-        if is_title:
-            font = ImageFont.truetype("fonts/Roboto-Bold.ttf", font_size)
-        else:
-            font = ImageFont.truetype("fonts/Roboto-Medium.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
+    if is_title:
+        font = load_font_or_default("fonts/Roboto-Bold.ttf", font_size)
+    else:
+        font = load_font_or_default("fonts/Roboto-Medium.ttf", font_size)
     
     # Word wrap the text
     wrapped_lines = wrap_text_to_fit(text, font, max_width)
@@ -405,57 +498,51 @@ def add_premium_text(draw, text: str, W: int, H: int, is_title: bool = False, te
     # Start drawing from center
     current_y = y_offset - (total_height // 2)
     
+    layers = (
+        *PREMIUM_SHADOW_LAYERS,
+        *((dx, dy, stroke_color) for dx, dy in OUTLINE_OFFSETS),
+        (0, 0, text_color),
+    )
+    
     for line in wrapped_lines:
-        # Get text dimensions
-        text_bbox = draw.textbbox((0, 0), line, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
+        # Get text dimensions (cached per font and line)
+        text_width, _ = getsize(font, line)
         
         # Center the text
         x = (W - text_width) // 2
         
-        # Multiple shadow layers for depth
-        shadow_layers = [
-            (4, 4, (0, 0, 0, 120)),
-            (3, 3, (0, 0, 0, 100)),
-            (2, 2, (0, 0, 0, 80)),
-            (1, 1, (0, 0, 0, 60))
-        ]
-        
-        # Draw shadow layers
-        for dx, dy, shadow_color in shadow_layers:
-            draw.text((x + dx, current_y + dy), line, font=font, fill=shadow_color)
-        
-        # Draw stroke/outline
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx != 0 or dy != 0:
-                    draw.text((x + dx, current_y + dy), line, font=font, fill=stroke_color)
-        
-        # Draw main text with slight glow
-        draw.text((x, current_y), line, font=font, fill=text_color)
+        # Multiple shadow layers for depth, the stroke/outline, then the main text
+        draw_text_layers(draw, (x, current_y), line, font, layers)
         
         current_y += line_height
 
+# Sparkle colours for the title card decorations
+SPARKLE_COLORS: Final = (
+    (255, 255, 255, 200),
+    (199, 21, 133, 180),
+    (147, 112, 219, 160),
+    (138, 43, 226, 140),
+)
+
+
+@lru_cache(maxsize=4)
+def sparkle_layout(W: int, H: int) -> tuple:
+    """The (x, y, size, colour) of the 20 title card sparkles. They come from a fixed seed so
+    every title looks the same; a private generator keeps the global random state untouched."""
+    rng = random.Random(42)  # Consistent decorations
+    sparkles = []
+    for _ in range(20):
+        x = rng.randint(50, W - 50)
+        y = rng.randint(50, H - 50)
+        size = rng.randint(2, 6)
+        sparkles.append((x, y, size, rng.choice(SPARKLE_COLORS)))
+    return tuple(sparkles)
+
+
 def add_premium_decorations(draw, W: int, H: int):
     """Add premium decorative elements"""
-    import random
-    random.seed(42)  # Consistent decorations
-    
     # Add elegant sparkles and particles
-    for _ in range(20):
-        x = random.randint(50, W - 50)
-        y = random.randint(50, H - 50)
-        size = random.randint(2, 6)
-        
-        # Sparkle colors
-        colors = [
-            (255, 255, 255, 200),
-            (199, 21, 133, 180),
-            (147, 112, 219, 160),
-            (138, 43, 226, 140)
-        ]
-        color = random.choice(colors)
-        
+    for x, y, size, color in sparkle_layout(W, H):
         # Draw diamond sparkle
         points = [
             (x, y - size),      # top
@@ -488,21 +575,34 @@ def add_premium_decorations(draw, W: int, H: int):
 
 def wrap_text_to_fit(text: str, font, max_width: int) -> list:
     """Wrap text to fit within specified width"""
-    words = text.split()
+    # The running sum of word and space advances estimates a candidate line's width without
+    # shaping it. The ink bbox of the joined line is what decides, and the two differ by side
+    # bearings and kerning, so lines within a margin of max_width are confirmed with the bbox
+    space_width = getlength(font, ' ')
+    margin = getattr(font, 'size', 10) / 4
     lines = []
     current_line = []
+    current_width = 0
     
-    for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = font.getbbox(test_line)
-        width = bbox[2] - bbox[0]
+    for word in text.split():
+        word_width = getlength(font, word)
+        width = current_width + space_width + word_width if current_line else word_width
         
-        if width <= max_width:
+        if width <= max_width - margin:
+            fits = True
+        elif width > max_width + margin:
+            fits = False
+        else:
+            fits = getsize(font, ' '.join(current_line + [word]))[0] <= max_width
+        
+        if fits:
             current_line.append(word)
+            current_width = width
         else:
             if current_line:
                 lines.append(' '.join(current_line))
                 current_line = [word]
+                current_width = word_width
             else:
                 # Single word too long, force it
                 lines.append(word)
@@ -515,56 +615,60 @@ def wrap_text_to_fit(text: str, font, max_width: int) -> list:
 def split_text_into_segments(text, max_chars: int = 300) -> list:
     """Split text into readable segments"""
     # Handle case where text might be a list
-    if isinstance(text, list):
-        text = ' '.join(str(item) for item in text)
-    elif not isinstance(text, str):
-        text = str(text)
-    
-    sentences = text.split('. ')
-    segments = []
-    current_segment = ""
+    text = ensure_str(text)
     
+    # Integer lengths, so "shorter than max_chars" is "at most max_chars - 1"
+    return list(pack_sentences(text.split('. '), max_chars - 1))
+
+def pack_sentences(sentences, max_chars: int):
+    """Greedily packs sentences into chunks, each sentence followed by ". ". A sentence joins
+    the current chunk while the chunk's length plus the sentence stays within max_chars, and
+    otherwise starts the next one. Chunks are kept as lists of parts with a running length and
+    joined once when flushed.
+    """
+    current_parts = []
+    current_len = 0
     for sentence in sentences:
-        if len(current_segment + sentence) < max_chars:
-            current_segment += sentence + ". "
+        if current_len + len(sentence) <= max_chars:
+            current_parts.append(sentence + ". ")
+            current_len += len(sentence) + 2
         else:
-            if current_segment:
-                segments.append(current_segment.strip())
-            current_segment = sentence + ". "
-    
-    if current_segment:
-        segments.append(current_segment.strip())
-    
-    return segments
+            if current_parts:
+                yield "".join(current_parts).strip()
+            current_parts = [sentence + ". "]
+            current_len = len(sentence) + 2
+    if current_parts:
+        yield "".join(current_parts).strip()
 
 def create_dynamic_word_chunks(text, words_per_chunk=7):
-    """Split text into dynamic chunks of 5-10 words, optimized for 2 lines"""
+    """Split text into dynamic chunks of 5-10 words, optimized for 2 lines.
+    Raises ValueError if words_per_chunk is below 1
+    """
     # Handle case where text might be a list
-    if isinstance(text, list):
-        text = ' '.join(str(item) for item in text)
-    elif not isinstance(text, str):
-        text = str(text)
+    text = ensure_str(text)
     
-    # Clean the text
+    # str.split() already splits on newlines and runs of whitespace
     words = text.split()
-    chunks = []
     
-    i = 0
-    while i < len(words):
-        # Take 5-10 words, but prefer 6-8 for better 2-line split
-        chunk_size = min(words_per_chunk, len(words) - i)
-        if chunk_size < 3 and chunks:  # If remaining words are too few, add to last chunk
-            chunks[-1] += " " + " ".join(words[i:])
-            break
-        
-        chunk_words = words[i:i + chunk_size]
-        chunk_text = " ".join(chunk_words)
-        
-        # Split into 2 lines for better display
-        formatted_chunk = split_into_two_lines(chunk_text)
-        chunks.append(formatted_chunk)
-        
-        i += chunk_size
+    if words_per_chunk < 1:
+        raise ValueError("words_per_chunk must be at least 1")
+    # A tail of fewer than 3 words is too short for its own chunk and joins the last one.
+    # Below 3 words per chunk every chunk after the first is that short, so they all join it
+    if words_per_chunk < 3:
+        tail = max(0, len(words) - words_per_chunk)
+    else:
+        tail = len(words) % words_per_chunk
+        if tail >= 3 or len(words) <= words_per_chunk:
+            tail = 0
+    body = words[:len(words) - tail]
+    
+    # Split each chunk into 2 lines for better display
+    chunks = [
+        split_into_two_lines(" ".join(body[i:i + words_per_chunk]))
+        for i in range(0, len(body), words_per_chunk)
+    ]
+    if tail:
+        chunks[-1] += " " + " ".join(words[-tail:])
     
     return chunks
 
@@ -594,7 +698,7 @@ def split_into_two_lines(text):
 def create_dynamic_text_image(text: str, filename: str, reddit_id: str, W: int, H: int):
     """Create dynamic text images optimized for 2-line display"""
     # Create transparent base
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
+    img = blank_canvas(W, H)
     draw = ImageDraw.Draw(img)
     
     # Smaller, more elegant text area for dynamic display
@@ -609,29 +713,19 @@ def create_dynamic_text_image(text: str, filename: str, reddit_id: str, W: int,
     # Create compact rounded rectangle with premium styling
     corner_radius = 30
     
-    # Multi-layer glow effect (more compact)
-    for i in range(6):
-        glow_alpha = int(50 * (6 - i) / 6)
-        glow_expand = i * 2
-        
-        # Compact outer glow
-        draw.rounded_rectangle([
-            (x_start - glow_expand, y_start - glow_expand), 
-            (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
-        ], radius=corner_radius + glow_expand, fill=(138, 43, 226, glow_alpha))
+    # Multi-layer glow effect (more compact). Drawing on an RGBA canvas replaces pixels instead of
+    # blending them, and each layer fully covers the one before it, so only the outermost
+    # layer ever reached the image; it is the only one drawn
+    glow_alpha = int(50 / 6)
+    glow_expand = (6 - 1) * 2
+    draw.rounded_rectangle([
+        (x_start - glow_expand, y_start - glow_expand), 
+        (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
+    ], radius=corner_radius + glow_expand, fill=(138, 43, 226, glow_alpha))
     
     # Dynamic gradient background
-    for i in range(text_area_height):
-        ratio = i / text_area_height
-        r = int(40 * (1 - ratio) + 60 * ratio)
-        g = int(20 * (1 - ratio) + 30 * ratio)
-        b = int(80 * (1 - ratio) + 120 * ratio)
-        alpha = 220
-        
-        draw.rectangle([
-            (x_start, y_start + i), 
-            (x_start + text_area_width, y_start + i + 1)
-        ], fill=(r, g, b, alpha))
+    gradient = gradient_panel(text_area_width, text_area_height, (40, 20, 80), (60, 30, 120), 220)
+    img.paste(gradient, (x_start, y_start))
     
     # Elegant border with dynamic colors
     border_colors = [(255, 105, 180, 255), (138, 43, 226, 255), (75, 0, 130, 255)]
@@ -644,7 +738,7 @@ def create_dynamic_text_image(text: str, filename: str, reddit_id: str, W: int,
     # Add dynamic text content
     add_dynamic_text(draw, text, W, H, text_area_bounds=(x_start, y_start, text_area_width, text_area_height))
     
-    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG")
+    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG", compress_level=1)
 
 def add_dynamic_text(draw, text: str, W: int, H: int, text_area_bounds=None):
     """Add dynamic text optimized for 2-line display"""
@@ -653,10 +747,7 @@ def add_dynamic_text(draw, text: str, W: int, H: int, text_area_bounds=None):
     stroke_color = (255, 105, 180, 200)
     
     # Load dynamic font
-    try:
-        font = ImageFont.truetype("fonts/Roboto-Bold.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
+    font = load_font_or_default("fonts/Roboto-Bold.ttf", font_size)
     
     # Handle 2-line text
     lines = text.split('\n') if '\n' in text else [text]
@@ -671,249 +762,28 @@ def add_dynamic_text(draw, text: str, W: int, H: int, text_area_bounds=None):
         # Center vertically in the text area
         current_y = y_start + (area_height - total_height) // 2
         
+        layers = (
+            *DYNAMIC_SHADOW_LAYERS,
+            *((dx, dy, stroke_color) for dx, dy in OUTLINE_OFFSETS),
+            (0, 0, text_color),
+        )
+        
         for line in lines:
-            # Get text dimensions
-            text_bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
+            # Get text dimensions (cached per font and line)
+            text_width, _ = getsize(font, line)
             
             # Center the text horizontally
             x = (W - text_width) // 2
             
-            # Dynamic shadow layers
-            shadow_layers = [
-                (3, 3, (0, 0, 0, 150)),
-                (2, 2, (0, 0, 0, 120)),
-                (1, 1, (0, 0, 0, 100))
-            ]
-            
-            # Draw shadow layers
-            for dx, dy, shadow_color in shadow_layers:
-                draw.text((x + dx, current_y + dy), line, font=font, fill=shadow_color)
-            
-            # Draw dynamic stroke/outline
-            for dx in [-2, -1, 0, 1, 2]:
-                for dy in [-2, -1, 0, 1, 2]:
-                    if dx != 0 or dy != 0:
-                        draw.text((x + dx, current_y + dy), line, font=font, fill=stroke_color)
-            
-            # Draw main text with glow
-            draw.text((x, current_y), line, font=font, fill=text_color)
+            # Dynamic shadow layers, the stroke/outline, then the main text
+            draw_text_layers(draw, (x, current_y), line, font, layers)
             
             current_y += line_height
 
-def create_title_image(title: str, reddit_id: str, W: int, H: int):
-    """Create a gorgeous title image with premium styling"""
-    # Create base image
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Create beautiful gradient background - smaller and more elegant
-    gradient_height = H // 3  # Make it smaller
-    gradient_y_start = H // 3
-    
-    for y in range(gradient_height):
-        # Elegant purple-to-pink gradient
-        ratio = y / gradient_height
-        r = int(147 * (1 - ratio) + 199 * ratio)  # Purple to pink
-        g = int(112 * (1 - ratio) + 21 * ratio)
-        b = int(219 * (1 - ratio) + 133 * ratio)
-        alpha = int(200 * (1 - ratio * 0.3))  # Fade out gradually
-        
-        draw.rectangle([(0, gradient_y_start + y), (W, gradient_y_start + y + 1)], 
-                      fill=(r, g, b, alpha))
-    
-    # Add stylish title text
-    add_premium_text(draw, title, W, H, is_title=True)
-    
-    # Add elegant decorative elements
-    add_premium_decorations(draw, W, H)
-    
-    img.save(f"assets/temp/{reddit_id}/png/title.png", "PNG")
-
-def create_content_image(text: str, filename: str, reddit_id: str, W: int, H: int):
-    """Create elegant content images with smaller, prettier text boxes"""
-    # Create transparent base
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Calculate smaller, more elegant text area
-    padding = 80
-    text_area_width = W - (padding * 2)
-    text_area_height = H // 3  # Much smaller box
-    
-    # Center the text area
-    x_start = padding
-    y_start = (H - text_area_height) // 2
-    
-    # Create rounded rectangle background with gradient
-    corner_radius = 25
-    
-    # Draw multiple layers for glow effect
-    for i in range(8):
-        glow_alpha = int(40 * (8 - i) / 8)
-        glow_expand = i * 3
-        
-        # Outer glow
-        draw.rounded_rectangle([
-            (x_start - glow_expand, y_start - glow_expand), 
-            (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
-        ], radius=corner_radius + glow_expand, fill=(147, 112, 219, glow_alpha))
-    
-    # Main background with gradient effect
-    for i in range(text_area_height):
-        ratio = i / text_area_height
-        r = int(30 * (1 - ratio) + 50 * ratio)
-        g = int(30 * (1 - ratio) + 30 * ratio)
-        b = int(60 * (1 - ratio) + 80 * ratio)
-        alpha = 200
-        
-        draw.rectangle([
-            (x_start, y_start + i), 
-            (x_start + text_area_width, y_start + i + 1)
-        ], fill=(r, g, b, alpha))
-    
-    # Add elegant border
-    border_colors = [(199, 21, 133, 255), (147, 112, 219, 255), (138, 43, 226, 255)]
-    for i, color in enumerate(border_colors):
-        draw.rounded_rectangle([
-            (x_start - i - 1, y_start - i - 1), 
-            (x_start + text_area_width + i + 1, y_start + text_area_height + i + 1)
-        ], radius=corner_radius + i, outline=color, width=2)
-    
-    # Add premium text content
-    add_premium_text(draw, text, W, H, is_title=False, 
-                    text_area_bounds=(x_start, y_start, text_area_width, text_area_height))
-    
-    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG")
-
-def add_premium_text(draw, text: str, W: int, H: int, is_title: bool = False, text_area_bounds=None):
-    """Add premium styled text with beautiful typography"""
-    if is_title:
-        font_size = 68
-        text_color = (255, 255, 255, 255)
-        stroke_color = (147, 112, 219, 200)
-        y_offset = H // 2.5
-        max_width = W - 140
-    else:
-        font_size = 42
-        text_color = (255, 255, 255, 255)
-        stroke_color = (199, 21, 133, 180)
-        # Use the bounds of the text area
-        if text_area_bounds:
-            x_start, y_start, area_width, area_height = text_area_bounds
-            y_offset = y_start + (area_height // 2)
-            max_width = area_width - 40
-        else:
-            y_offset = H // 2
-            max_width = W - 160
-    
-    # Load premium font
-    try:
-        if is_title:
-            font = ImageFont.truetype("fonts/Roboto-Bold.ttf", font_size)
-        else:
-            font = ImageFont.truetype("fonts/Roboto-Medium.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
-    
-    # Word wrap the text
-    wrapped_lines = wrap_text_to_fit(text, font, max_width)
-    
-    # Calculate total text height
-    line_height = font_size + 12
-    total_height = len(wrapped_lines) * line_height
-    
-    # Start drawing from center
-    current_y = y_offset - (total_height // 2)
-    
-    for line in wrapped_lines:
-        # Get text dimensions
-        text_bbox = draw.textbbox((0, 0), line, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        
-        # Center the text
-        x = (W - text_width) // 2
-        
-        # Multiple shadow layers for depth
-        shadow_layers = [
-            (4, 4, (0, 0, 0, 120)),
-            (3, 3, (0, 0, 0, 100)),
-            (2, 2, (0, 0, 0, 80)),
-            (1, 1, (0, 0, 0, 60))
-        ]
-        
-        # Draw shadow layers
-        for dx, dy, shadow_color in shadow_layers:
-            draw.text((x + dx, current_y + dy), line, font=font, fill=shadow_color)
-        
-        # Draw stroke/outline
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx != 0 or dy != 0:
-                    draw.text((x + dx, current_y + dy), line, font=font, fill=stroke_color)
-        
-        # Draw main text with slight glow
-        draw.text((x, current_y), line, font=font, fill=text_color)
-        
-        current_y += line_height
-
-def add_premium_decorations(draw, W: int, H: int):
-    """Add premium decorative elements"""
-    import random
-    random.seed(42)  # Consistent decorations
-    
-    # Add elegant sparkles and particles
-    for _ in range(20):
-        x = random.randint(50, W - 50)
-        y = random.randint(50, H - 50)
-        size = random.randint(2, 6)
-        
-        # Sparkle colors
-        colors = [
-            (255, 255, 255, 200),
-            (199, 21, 133, 180),
-            (147, 112, 219, 160),
-            (138, 43, 226, 140)
-        ]
-        color = random.choice(colors)
-        
-        # Draw diamond sparkle
-        points = [
-            (x, y - size),      # top
-            (x + size, y),      # right
-            (x, y + size),      # bottom
-            (x - size, y)       # left
-        ]
-        draw.polygon(points, fill=color)
-        
-        # Add small center glow
-        draw.ellipse((x-1, y-1, x+1, y+1), fill=(255, 255, 255, 255))
-    
-    # Add elegant corner decorations
-    corner_size = 30
-    corner_color = (199, 21, 133, 100)
-    
-    # Top corners
-    for corner_x in [30, W-60]:
-        for i in range(3):
-            draw.arc((corner_x-corner_size+i*5, 30-corner_size+i*5, 
-                     corner_x+corner_size-i*5, 30+corner_size-i*5), 
-                    start=0, end=90, fill=corner_color, width=2)
-    
-    # Bottom corners  
-    for corner_x in [30, W-60]:
-        for i in range(3):
-            draw.arc((corner_x-corner_size+i*5, H-60-corner_size+i*5, 
-                     corner_x+corner_size-i*5, H-60+corner_size-i*5), 
-                    start=180, end=270, fill=corner_color, width=2)
-
 def create_large_text_chunks(text, target_chunks=4):
     """Split text into larger chunks for easier subtitle syncing"""
     # Handle case where text might be a list
-    if isinstance(text, list):
-        text = ' '.join(str(item) for item in text)
-    elif not isinstance(text, str):
-        text = str(text)
+    text = ensure_str(text)
     
     # Clean the text
     sentences = text.split('. ')
@@ -971,13 +841,13 @@ def format_large_chunk(text):
 def create_large_text_image(text: str, filename: str, reddit_id: str, W: int, H: int):
     """Create larger text images optimized for easy syncing"""
     # Create transparent base
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
+    img = blank_canvas(W, H)
     draw = ImageDraw.Draw(img)
     
     # Larger text area for substantial content
     padding = 60
     text_area_width = W - (padding * 2)
-    text_area_height = H // 2.5  # Bigger area for more text
+    text_area_height = int(H // 2.5)  # Bigger area for more text
     
     # Center the text area
     x_start = padding
@@ -986,29 +856,19 @@ def create_large_text_image(text: str, filename: str, reddit_id: str, W: int, H:
     # Create elegant rounded rectangle with premium styling
     corner_radius = 25
     
-    # Multi-layer glow effect
-    for i in range(8):
-        glow_alpha = int(45 * (8 - i) / 8)
-        glow_expand = i * 3
-        
-        # Elegant outer glow
-        draw.rounded_rectangle([
-            (x_start - glow_expand, y_start - glow_expand), 
-            (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
-        ], radius=corner_radius + glow_expand, fill=(138, 43, 226, glow_alpha))
+    # Multi-layer glow effect. Drawing on an RGBA canvas replaces pixels instead of
+    # blending them, and each layer fully covers the one before it, so only the outermost
+    # layer ever reached the image; it is the only one drawn
+    glow_alpha = int(45 / 8)
+    glow_expand = (8 - 1) * 3
+    draw.rounded_rectangle([
+        (x_start - glow_expand, y_start - glow_expand), 
+        (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
+    ], radius=corner_radius + glow_expand, fill=(138, 43, 226, glow_alpha))
     
     # Beautiful gradient background
-    for i in range(text_area_height):
-        ratio = i / text_area_height
-        r = int(35 * (1 - ratio) + 55 * ratio)
-        g = int(25 * (1 - ratio) + 35 * ratio)
-        b = int(70 * (1 - ratio) + 100 * ratio)
-        alpha = 210
-        
-        draw.rectangle([
-            (x_start, y_start + i), 
-            (x_start + text_area_width, y_start + i + 1)
-        ], fill=(r, g, b, alpha))
+    gradient = gradient_panel(text_area_width, text_area_height, (35, 25, 70), (55, 35, 100), 210)
+    img.paste(gradient, (x_start, y_start))
     
     # Premium border with multiple colors
     border_colors = [(255, 105, 180, 255), (138, 43, 226, 255), (75, 0, 130, 255)]
@@ -1021,7 +881,8 @@ def create_large_text_image(text: str, filename: str, reddit_id: str, W: int, H:
     # Add large text content
     add_large_text(draw, text, W, H, text_area_bounds=(x_start, y_start, text_area_width, text_area_height))
     
-    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG")
+    # Fast zlib level: these are temporary files that ffmpeg reads once
+    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG", compress_level=1)
 
 def add_large_text(draw, text: str, W: int, H: int, text_area_bounds=None):
     """Add large text optimized for easy reading and syncing"""
@@ -1030,10 +891,7 @@ def add_large_text(draw, text: str, W: int, H: int, text_area_bounds=None):
     stroke_color = (255, 105, 180, 200)
     
     # Load font
-    try:
-        font = ImageFont.truetype("fonts/Roboto-Bold.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
+    font = load_font_or_default("fonts/Roboto-Bold.ttf", font_size)
     
     # Handle multi-line text
     lines = text.split('\n') if '\n' in text else [text]
@@ -1048,239 +906,20 @@ def add_large_text(draw, text: str, W: int, H: int, text_area_bounds=None):
         # Center vertically in the text area
         current_y = y_start + (area_height - total_height) // 2
         
+        layers = (
+            *LARGE_SHADOW_LAYERS,
+            *((dx, dy, stroke_color) for dx, dy in OUTLINE_OFFSETS),
+            (0, 0, text_color),
+        )
+        
         for line in lines:
-            # Get text dimensions
-            text_bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
+            # Get text dimensions (cached per font and line)
+            text_width, _ = getsize(font, line)
             
             # Center the text horizontally
             x = (W - text_width) // 2
             
-            # Premium shadow layers
-            shadow_layers = [
-                (4, 4, (0, 0, 0, 140)),
-                (3, 3, (0, 0, 0, 120)),
-                (2, 2, (0, 0, 0, 100)),
-                (1, 1, (0, 0, 0, 80))
-            ]
-            
-            # Draw shadow layers
-            for dx, dy, shadow_color in shadow_layers:
-                draw.text((x + dx, current_y + dy), line, font=font, fill=shadow_color)
-            
-            # Draw stroke/outline
-            for dx in [-2, -1, 0, 1, 2]:
-                for dy in [-2, -1, 0, 1, 2]:
-                    if dx != 0 or dy != 0:
-                        draw.text((x + dx, current_y + dy), line, font=font, fill=stroke_color)
-            
-            # Draw main text
-            draw.text((x, current_y), line, font=font, fill=text_color)
+            # Premium shadow layers, the stroke/outline, then the main text
+            draw_text_layers(draw, (x, current_y), line, font, layers)
             
             current_y += line_height
-
-def create_title_image(title: str, reddit_id: str, W: int, H: int):
-    """Create a gorgeous title image with premium styling"""
-    # Create base image
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Create beautiful gradient background - smaller and more elegant
-    gradient_height = H // 3  # Make it smaller
-    gradient_y_start = H // 3
-    
-    for y in range(gradient_height):
-        # Elegant purple-to-pink gradient
-        ratio = y / gradient_height
-        r = int(147 * (1 - ratio) + 199 * ratio)  # Purple to pink
-        g = int(112 * (1 - ratio) + 21 * ratio)
-        b = int(219 * (1 - ratio) + 133 * ratio)
-        alpha = int(200 * (1 - ratio * 0.3))  # Fade out gradually
-        
-        draw.rectangle([(0, gradient_y_start + y), (W, gradient_y_start + y + 1)], 
-                      fill=(r, g, b, alpha))
-    
-    # Add stylish title text
-    add_premium_text(draw, title, W, H, is_title=True)
-    
-    # Add elegant decorative elements
-    add_premium_decorations(draw, W, H)
-    
-    img.save(f"assets/temp/{reddit_id}/png/title.png", "PNG")
-
-def create_content_image(text: str, filename: str, reddit_id: str, W: int, H: int):
-    """Create elegant content images with smaller, prettier text boxes"""
-    # Create transparent base
-    img = Image.new('RGBA', (W, H), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    # Calculate smaller, more elegant text area
-    padding = 80
-    text_area_width = W - (padding * 2)
-    text_area_height = H // 3  # Much smaller box
-    
-    # Center the text area
-    x_start = padding
-    y_start = (H - text_area_height) // 2
-    
-    # Create rounded rectangle background with gradient
-    corner_radius = 25
-    
-    # Draw multiple layers for glow effect
-    for i in range(8):
-        glow_alpha = int(40 * (8 - i) / 8)
-        glow_expand = i * 3
-        
-        # Outer glow
-        draw.rounded_rectangle([
-            (x_start - glow_expand, y_start - glow_expand), 
-            (x_start + text_area_width + glow_expand, y_start + text_area_height + glow_expand)
-        ], radius=corner_radius + glow_expand, fill=(147, 112, 219, glow_alpha))
-    
-    # Main background with gradient effect
-    for i in range(text_area_height):
-        ratio = i / text_area_height
-        r = int(30 * (1 - ratio) + 50 * ratio)
-        g = int(30 * (1 - ratio) + 30 * ratio)
-        b = int(60 * (1 - ratio) + 80 * ratio)
-        alpha = 200
-        
-        draw.rectangle([
-            (x_start, y_start + i), 
-            (x_start + text_area_width, y_start + i + 1)
-        ], fill=(r, g, b, alpha))
-    
-    # Add elegant border
-    border_colors = [(199, 21, 133, 255), (147, 112, 219, 255), (138, 43, 226, 255)]
-    for i, color in enumerate(border_colors):
-        draw.rounded_rectangle([
-            (x_start - i - 1, y_start - i - 1), 
-            (x_start + text_area_width + i + 1, y_start + text_area_height + i + 1)
-        ], radius=corner_radius + i, outline=color, width=2)
-    
-    # Add premium text content
-    add_premium_text(draw, text, W, H, is_title=False, 
-                    text_area_bounds=(x_start, y_start, text_area_width, text_area_height))
-    
-    img.save(f"assets/temp/{reddit_id}/png/{filename}.png", "PNG")
-
-def add_premium_text(draw, text: str, W: int, H: int, is_title: bool = False, text_area_bounds=None):
-    """Add premium styled text with beautiful typography"""
-    if is_title:
-        font_size = 68
-        text_color = (255, 255, 255, 255)
-        stroke_color = (147, 112, 219, 200)
-        y_offset = H // 2.5
-        max_width = W - 140
-    else:
-        font_size = 42
-        text_color = (255, 255, 255, 255)
-        stroke_color = (199, 21, 133, 180)
-        # Use the bounds of the text area
-        if text_area_bounds:
-            x_start, y_start, area_width, area_height = text_area_bounds
-            y_offset = y_start + (area_height // 2)
-            max_width = area_width - 40
-        else:
-            y_offset = H // 2
-            max_width = W - 160
-    
-    # Load premium font
-    try:
-        if is_title:
-            font = ImageFont.truetype("fonts/Roboto-Bold.ttf", font_size)
-        else:
-            font = ImageFont.truetype("fonts/Roboto-Medium.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
-    
-    # Word wrap the text
-    wrapped_lines = wrap_text_to_fit(text, font, max_width)
-    
-    # Calculate total text height
-    line_height = font_size + 12
-    total_height = len(wrapped_lines) * line_height
-    
-    # Start drawing from center
-    current_y = y_offset - (total_height // 2)
-    
-    for line in wrapped_lines:
-        # Get text dimensions
-        text_bbox = draw.textbbox((0, 0), line, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        
-        # Center the text
-        x = (W - text_width) // 2
-        
-        # Multiple shadow layers for depth
-        shadow_layers = [
-            (4, 4, (0, 0, 0, 120)),
-            (3, 3, (0, 0, 0, 100)),
-            (2, 2, (0, 0, 0, 80)),
-            (1, 1, (0, 0, 0, 60))
-        ]
-        
-        # Draw shadow layers
-        for dx, dy, shadow_color in shadow_layers:
-            draw.text((x + dx, current_y + dy), line, font=font, fill=shadow_color)
-        
-        # Draw stroke/outline
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx != 0 or dy != 0:
-                    draw.text((x + dx, current_y + dy), line, font=font, fill=stroke_color)
-        
-        # Draw main text with slight glow
-        draw.text((x, current_y), line, font=font, fill=text_color)
-        
-        current_y += line_height
-
-def add_premium_decorations(draw, W: int, H: int):
-    """Add premium decorative elements"""
-    import random
-    random.seed(42)  # Consistent decorations
-    
-    # Add elegant sparkles and particles
-    for _ in range(20):
-        x = random.randint(50, W - 50)
-        y = random.randint(50, H - 50)
-        size = random.randint(2, 6)
-        
-        # Sparkle colors
-        colors = [
-            (255, 255, 255, 200),
-            (199, 21, 133, 180),
-            (147, 112, 219, 160),
-            (138, 43, 226, 140)
-        ]
-        color = random.choice(colors)
-        
-        # Draw diamond sparkle
-        points = [
-            (x, y - size),      # top
-            (x + size, y),      # right
-            (x, y + size),      # bottom
-            (x - size, y)       # left
-        ]
-        draw.polygon(points, fill=color)
-        
-        # Add small center glow
-        draw.ellipse((x-1, y-1, x+1, y+1), fill=(255, 255, 255, 255))
-    
-    # Add elegant corner decorations
-    corner_size = 30
-    corner_color = (199, 21, 133, 100)
-    
-    # Top corners
-    for corner_x in [30, W-60]:
-        for i in range(3):
-            draw.arc((corner_x-corner_size+i*5, 30-corner_size+i*5, 
-                     corner_x+corner_size-i*5, 30+corner_size-i*5), 
-                    start=0, end=90, fill=corner_color, width=2)
-    
-    # Bottom corners  
-    for corner_x in [30, W-60]:
-        for i in range(3):
-            draw.arc((corner_x-corner_size+i*5, H-60-corner_size+i*5, 
-                     corner_x+corner_size-i*5, H-60+corner_size-i*5), 
-                    start=180, end=270, fill=corner_color, width=2) 
\ No newline at end of file